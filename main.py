@@ -1,17 +1,18 @@
 import argparse
 import logging
 
-import plotly.express as px
-
 from src.simulations import get_circuit_to_print, run_all_combinations, run_one_combination, run_random_errors
 
 logging.basicConfig(format='%(levelname)s:\t\t%(asctime)s - %(name)s - %(message)s')
 logger = logging.getLogger('QOSF')
 logger.setLevel(logging.INFO)
 
+# Number of ancillas per qubit needed by each correction type
+_N_ANCILLAS = {'no_correction': 0, 'simple': 1, 'repetition_simple': 2, 'shor': 8}
+
 parser = argparse.ArgumentParser(description='Bell state circuit with error correction simulation.')
 parser.add_argument('correction', help='The type of correction to use', type=str,
-                    choices=['no_correction', 'simple', 'repetition_simple', 'shor'])
+                    choices=list(_N_ANCILLAS))
 parser.add_argument('--print-circuit',
                     help='Plot circuit with symbolic errors. If present all the simulation arguments '
                          'will be ignored and it will only plot the circuit.',
@@ -43,13 +44,7 @@ parser.add_argument('-o', '--output', help='File path to store output.', type=st
 def run_simulation():
     args = parser.parse_args()
 
-    n_ancillas = 0
-    if args.correction == 'simple':
-        n_ancillas = 1
-    elif args.correction == 'repetition_simple':
-        n_ancillas = 2
-    elif args.correction == 'shor':
-        n_ancillas = 8
+    n_ancillas = _N_ANCILLAS[args.correction]
 
     if args.print_circuit:
         logger.info('Skipping simulations and printing only the circuit with symbolic errors.')
@@ -78,17 +73,19 @@ def run_simulation():
                                                   else None,
                                                   args.seed)
 
-    logger.info('Plot the counts')
-    fig = px.bar(x=counts.keys(), y=counts.values(), labels={'x': 'Measured state', 'y': 'Counts'})
-    fig.show()
-
     if args.output:
         logger.info(f'Writing output in {args.output}')
         with open(args.output, 'w') as f:
             f.write(f'Total counts: {dict(counts)}\n\n')
             f.write(f'Details with error split:\n')
             for key, value in err_to_counts.items():
-                f.write(f'{key}\t{value}\n')
+                f.write(f'{key}\t{dict(value)}\n')
+
+    logger.info('Plot the counts')
+    # Imported only here since it is slow to import and not needed to print the circuit
+    import plotly.express as px
+    fig = px.bar(x=counts.keys(), y=counts.values(), labels={'x': 'Measured state', 'y': 'Counts'})
+    fig.show()
 
 
 if __name__ == "__main__":
@@ -20,6 +20,8 @@ class BellCircuit:
         self.cbits = ClassicalRegister(2)
 
         self.circuit = QuantumCircuit(self.qubits, *self.anc_qubit, self.cbits)
+        self.pre_error_circuit = None
+        self.post_error_circuit = None
 
     def add_zero_bf_corr(self, qubit: int, in_place: bool = True) -> QuantumCircuit:
         """
@@ -38,16 +40,15 @@ class BellCircuit:
             raise ValueError(f'There are only 2 qubits, so {qubit} is not a valid choice.'
                              f'Please insert 1 or 2!')
 
-        if self.anc_qubit[qubit - 1].size < 1:
+        q = self.qubits[qubit - 1]
+        anc = self.anc_qubit[qubit - 1]
+        if anc.size < 1:
             raise Exception(f'This method requires one ancilla per each qubit. '
-                            f'Currently qubit {qubit} has {self.anc_qubit[qubit - 1].size} ancillas.')
+                            f'Currently qubit {qubit} has {anc.size} ancillas.')
 
-        circuit = self.circuit.copy()
-        circuit.cx(self.qubits[qubit - 1], self.anc_qubit[qubit - 1][0])
-        circuit.cx(self.anc_qubit[qubit - 1][0], self.qubits[qubit - 1])
-
-        if in_place:
-            self.circuit = circuit
+        circuit = self.circuit if in_place else self.circuit.copy()
+        circuit.cx(q, anc[0])
+        circuit.cx(anc[0], q)
 
         return circuit
 
@@ -68,18 +69,17 @@ class BellCircuit:
             raise ValueError(f'There are only 2 qubits, so {qubit} is not a valid choice.'
                              f'Please insert 1 or 2!')
 
-        if self.anc_qubit[qubit - 1].size < 1:
+        q = self.qubits[qubit - 1]
+        anc = self.anc_qubit[qubit - 1]
+        if anc.size < 1:
             raise Exception(f'This method requires one ancilla per each qubit. '
-                            f'Currently qubit {qubit} has {self.anc_qubit[qubit - 1].size} ancillas.')
-
-        circuit = self.circuit.copy()
-        circuit.h(self.qubits[qubit - 1])
-        circuit.cx(self.qubits[qubit - 1], self.anc_qubit[qubit - 1][0])
-        circuit.cx(self.anc_qubit[qubit - 1][0], self.qubits[qubit - 1])
-        circuit.h(self.qubits[qubit - 1])
+                            f'Currently qubit {qubit} has {anc.size} ancillas.')
 
-        if in_place:
-            self.circuit = circuit
+        circuit = self.circuit if in_place else self.circuit.copy()
+        circuit.h(q)
+        circuit.cx(q, anc[0])
+        circuit.cx(anc[0], q)
+        circuit.h(q)
 
         return circuit
 
@@ -102,16 +102,16 @@ class BellCircuit:
             raise ValueError(f'There are only 2 qubits, so {qubit} is not a valid choice.'
                              f'Please insert 1 or 2!')
 
-        if self.anc_qubit[qubit - 1].size < 2:
+        q = self.qubits[qubit - 1]
+        anc = self.anc_qubit[qubit - 1]
+        if anc.size < 2:
             raise Exception(f'This method requires two ancilla per each qubit. '
-                            f'Currently qubit {qubit} has {self.anc_qubit[qubit - 1].size} ancillas.')
+                            f'Currently qubit {qubit} has {anc.size} ancillas.')
 
-        circuit = self.circuit.copy()
-        circuit.cx(self.qubits[qubit - 1], self.anc_qubit[qubit - 1][0])
-        circuit.cx(self.qubits[qubit - 1], self.anc_qubit[qubit - 1][1])
-        circuit.ccx(self.anc_qubit[qubit - 1][0], self.anc_qubit[qubit - 1][1], self.qubits[qubit - 1])
-        if in_place:
-            self.circuit = circuit
+        circuit = self.circuit if in_place else self.circuit.copy()
+        circuit.cx(q, anc[0])
+        circuit.cx(q, anc[1])
+        circuit.ccx(anc[0], anc[1], q)
 
         return circuit
 
@@ -134,19 +134,18 @@ class BellCircuit:
             raise ValueError(f'There are only 2 qubits, so {qubit} is not a valid choice.'
                              f'Please insert 1 or 2!')
 
-        if self.anc_qubit[qubit - 1].size < 2:
+        q = self.qubits[qubit - 1]
+        anc = self.anc_qubit[qubit - 1]
+        if anc.size < 2:
             raise Exception(f'This method requires two ancillas per each qubit. '
-                            f'Currently qubit {qubit} has {self.anc_qubit[qubit - 1].size} ancillas.')
-
-        circuit = self.circuit.copy()
-        circuit.h(self.qubits[qubit - 1])
-        circuit.cx(self.qubits[qubit - 1], self.anc_qubit[qubit - 1][0])
-        circuit.cx(self.qubits[qubit - 1], self.anc_qubit[qubit - 1][1])
-        circuit.ccx(self.anc_qubit[qubit - 1][0], self.anc_qubit[qubit - 1][1], self.qubits[qubit - 1])
-        circuit.h(self.qubits[qubit - 1])
+                            f'Currently qubit {qubit} has {anc.size} ancillas.')
 
-        if in_place:
-            self.circuit = circuit
+        circuit = self.circuit if in_place else self.circuit.copy()
+        circuit.h(q)
+        circuit.cx(q, anc[0])
+        circuit.cx(q, anc[1])
+        circuit.ccx(anc[0], anc[1], q)
+        circuit.h(q)
 
         return circuit
 
@@ -157,200 +156,243 @@ class BellCircuit:
             self.circuit.x(qubit)
 
     def add_error(self, qubit: Tuple[int, int], error_gate: str) -> None:
-        if qubit[0] not in [1, 2]:
-            raise ValueError(f'{qubit[0]} is not a valid choice as qubit value for error error.'
+        group, index = qubit
+        if group not in [1, 2]:
+            raise ValueError(f'{group} is not a valid choice as qubit value for error error.'
                              f'Please insert 1 or 2!')
-        elif len(self.anc_qubit) > 0 and qubit[1] > self.anc_qubit[qubit[0] - 1].size \
-                or len(self.anc_qubit) == 0 and qubit[1] != 0:
-            raise ValueError(f'In the error correction method  for qubit {qubit[0]} there are '
-                             f'{self.anc_qubit[qubit[0] - 1].size if len(self.anc_qubit) > 0 else 0} ancillas, '
-                             f'so {qubit[1]} is out of index '
+
+        n_anc = self.anc_qubit[group - 1].size if len(self.anc_qubit) > 0 else 0
+        if index > n_anc or len(self.anc_qubit) == 0 and index != 0:
+            raise ValueError(f'In the error correction method  for qubit {group} there are '
+                             f'{n_anc} ancillas, '
+                             f'so {index} is out of index '
                              f'for applying the error.')
-        if qubit[1] == 0:
-            self.add_error_gate(self.qubits[qubit[0] - 1], error_gate)
+        if index == 0:
+            self.add_error_gate(self.qubits[group - 1], error_gate)
         else:
             # If qubit to apply > 0, then it is an ancilla
-            self.add_error_gate(self.anc_qubit[qubit[0] - 1][qubit[1] - 1], error_gate)
+            self.add_error_gate(self.anc_qubit[group - 1][index - 1], error_gate)
 
     def add_measurement(self, in_pace: bool = True) -> QuantumCircuit:
         """
         Measurement that will return 00 if the state is (|00> + |11>)/sqrt(2).
         """
-        circuit = self.circuit.copy()
+        circuit = self.circuit if in_pace else self.circuit.copy()
         circuit.cx(self.qubits[0], self.qubits[1])
         circuit.h(self.qubits[0])
         circuit.measure(self.qubits[:], self.cbits[:])
 
-        if in_pace:
-            self.circuit = circuit
-
         return circuit
 
-    def _prepare_repetition(self, qubit: QuantumRegister, ancillas: QuantumRegister) -> None:
+    def _add_barrier(self, keep_barriers: bool) -> None:
+        """
+        Add a barrier between the circuit stages. Barriers are only useful to print the circuit, so they can be left
+        out of the circuits to simulate.
+        """
+        if keep_barriers:
+            self.circuit.barrier()
+
+    def _prepare_repetition(self, qubit: QuantumRegister, ancillas: QuantumRegister, keep_barriers: bool) -> None:
         """
         Circuit to prepare repetition for Shor error correction.
         """
+        circuit = self.circuit
 
         # Repetition for phase flip
-        self.circuit.cx(qubit, ancillas[2])
-        self.circuit.cx(qubit, ancillas[5])
-        self.circuit.h([qubit, ancillas[2], ancillas[5]])
-        self.circuit.barrier()
+        circuit.cx(qubit, ancillas[2])
+        circuit.cx(qubit, ancillas[5])
+        circuit.h([qubit, ancillas[2], ancillas[5]])
+        self._add_barrier(keep_barriers)
 
         # Repetition for bit flip
-        self.circuit.cx(qubit, ancillas[:2])
-        self.circuit.cx(ancillas[2], ancillas[3:5])
-        self.circuit.cx(ancillas[5], ancillas[6:])
-        self.circuit.barrier()
+        circuit.cx(qubit, ancillas[:2])
+        circuit.cx(ancillas[2], ancillas[3:5])
+        circuit.cx(ancillas[5], ancillas[6:])
+        self._add_barrier(keep_barriers)
 
-    def _add_shor_correction(self, qubit: QuantumRegister, ancillas: QuantumRegister) -> None:
+    def _add_shor_correction(self, qubit: QuantumRegister, ancillas: QuantumRegister, keep_barriers: bool) -> None:
         """
         Circuit for Shor error correction.
         """
+        circuit = self.circuit
 
         # Correction for bit flip
-        self.circuit.cx(qubit, ancillas[:2])
-        self.circuit.cx(ancillas[2], ancillas[3:5])
-        self.circuit.cx(ancillas[5], ancillas[6:])
-        self.circuit.barrier()
+        circuit.cx(qubit, ancillas[:2])
+        circuit.cx(ancillas[2], ancillas[3:5])
+        circuit.cx(ancillas[5], ancillas[6:])
+        self._add_barrier(keep_barriers)
 
-        self.circuit.ccx(ancillas[0], ancillas[1], qubit)
-        self.circuit.ccx(ancillas[3], ancillas[4], ancillas[2])
-        self.circuit.ccx(ancillas[6], ancillas[7], ancillas[5])
-        self.circuit.barrier()
+        circuit.ccx(ancillas[0], ancillas[1], qubit)
+        circuit.ccx(ancillas[3], ancillas[4], ancillas[2])
+        circuit.ccx(ancillas[6], ancillas[7], ancillas[5])
+        self._add_barrier(keep_barriers)
 
         # Correction for phase flip
-        self.circuit.h([qubit, ancillas[2], ancillas[5]])
-        self.circuit.cx(qubit, ancillas[2])
-        self.circuit.cx(qubit, ancillas[5])
-        self.circuit.barrier()
+        circuit.h([qubit, ancillas[2], ancillas[5]])
+        circuit.cx(qubit, ancillas[2])
+        circuit.cx(qubit, ancillas[5])
+        self._add_barrier(keep_barriers)
 
-        self.circuit.ccx(ancillas[2], ancillas[5], qubit)
-        self.circuit.barrier()
+        circuit.ccx(ancillas[2], ancillas[5], qubit)
+        self._add_barrier(keep_barriers)
 
-    def create_circuit_with_no_correction(self, errors: List[Tuple[Tuple[int, int], str]],
-                                          symb_err: bool = False) -> None:
+    def _add_errors(self, errors: List[Tuple[Tuple[int, int], str]], symb_err: bool, on_ancillas: bool,
+                    keep_barriers: bool) -> None:
         """
-        Create the circuit for obtaining the wanted Bell state with errors before cnot, but no correction.
+        Add the error gates, or the symbolic ones if symb_err is True.
         """
-        self.circuit.h(self.qubits[0])
-        self.circuit.barrier()
-
         if symb_err:
-            self.circuit.append(Instruction('err_1', 1, 0, []), [self.qubits[0]])
-            self.circuit.append(Instruction('err_2', 1, 0, []), [self.qubits[1]])
-            self.circuit.barrier()
+            if on_ancillas:
+                n_anc = self.anc_qubit[0].size
+                self.circuit.append(Instruction('err_1', n_anc + 1, 0, []), [self.qubits[0]] + self.anc_qubit[0][:])
+                self.circuit.append(Instruction('err_2', n_anc + 1, 0, []), [self.qubits[1]] + self.anc_qubit[1][:])
+            else:
+                self.circuit.append(Instruction('err_1', 1, 0, []), [self.qubits[0]])
+                self.circuit.append(Instruction('err_2', 1, 0, []), [self.qubits[1]])
         else:
             for qubit, error in errors:
                 self.add_error(qubit, error)
-            self.circuit.barrier()
+        self._add_barrier(keep_barriers)
+
+    def _no_correction_pre_error(self, keep_barriers: bool) -> None:
+        self.circuit.h(self.qubits[0])
+        self._add_barrier(keep_barriers)
 
+    def _no_correction_post_error(self, keep_barriers: bool) -> None:
         self.circuit.cx(self.qubits[0], self.qubits[1])
-        self.circuit.barrier()
+        self._add_barrier(keep_barriers)
 
         self.add_measurement()
 
-    def create_circuit_with_simple_correction(self, errors: List[Tuple[Tuple[int, int], str]],
-                                              symb_err: bool = False) -> None:
-        """
-        Create the circuit for obtaining the wanted Bell state with errors before cnot and only in the qubits,
-        not in the ancillas.
-        """
+    def _simple_correction_pre_error(self, keep_barriers: bool) -> None:
         if self.anc_qubit[0].size < 1 or self.anc_qubit[1].size < 1:
             raise Exception(f'This method requires one ancilla per each qubit. '
                             f'Currently qubit1 has {self.anc_qubit[0].size} ancillas '
                             f'and qubit2 has {self.anc_qubit[1].size} ancillas.')
 
         self.circuit.h(self.qubits[0])
-        self.circuit.barrier()
-
-        if symb_err:
-            self.circuit.append(Instruction('err_1', 1, 0, []), [self.qubits[0]])
-            self.circuit.append(Instruction('err_2', 1, 0, []), [self.qubits[1]])
-            self.circuit.barrier()
-        else:
-            for qubit, error in errors:
-                self.add_error(qubit, error)
-            self.circuit.barrier()
+        self._add_barrier(keep_barriers)
 
+    def _simple_correction_post_error(self, keep_barriers: bool) -> None:
         # Add simple correction
         self.add_x_pf_corr(1)
-        self.circuit.barrier()
+        self._add_barrier(keep_barriers)
         self.add_zero_bf_corr(2)
-        self.circuit.barrier()
+        self._add_barrier(keep_barriers)
 
         self.circuit.cx(self.qubits[0], self.qubits[1])
-        self.circuit.barrier()
+        self._add_barrier(keep_barriers)
 
         self.add_measurement()
 
-    def create_circuit_with_simple_repetition(self, errors: List[Tuple[Tuple[int, int], str]],
-                                              symb_err: bool = False) -> None:
-        """
-        Create the circuit for obtaining the wanted Bell state with errors before cnot and possible also for ancillas.
-        Use assumption on the initial states to simply correction.
-        """
+    def _simple_repetition_pre_error(self, keep_barriers: bool) -> None:
         if self.anc_qubit[0].size < 2 or self.anc_qubit[1].size < 2:
             raise Exception(f'This method requires two ancillas per each qubit. '
                             f'Currently qubit1 has {self.anc_qubit[0].size} ancillas '
                             f'and qubit2 has {self.anc_qubit[1].size} ancillas.')
 
         self.circuit.h(self.qubits[0])
-        self.circuit.barrier()
-
-        if symb_err:
-            self.circuit.append(Instruction('err_1', 3, 0, []), [self.qubits[0]] + self.anc_qubit[0][:])
-            self.circuit.append(Instruction('err_2', 3, 0, []), [self.qubits[1]] + self.anc_qubit[1][:])
-            self.circuit.barrier()
-        else:
-            for qubit, error in errors:
-                self.add_error(qubit, error)
-            self.circuit.barrier()
+        self._add_barrier(keep_barriers)
 
+    def _simple_repetition_post_error(self, keep_barriers: bool) -> None:
         # Add correction
         self.add_x_pf_corr_with_repetition(1)
-        self.circuit.barrier()
+        self._add_barrier(keep_barriers)
         self.add_zero_bf_corr_with_repetition(2)
-        self.circuit.barrier()
+        self._add_barrier(keep_barriers)
 
         self.circuit.cx(self.qubits[0], self.qubits[1])
-        self.circuit.barrier()
+        self._add_barrier(keep_barriers)
 
         self.add_measurement()
 
-    def create_circuit_with_shor_correction(self, errors: List[Tuple[Tuple[int, int], str]],
-                                            symb_err: bool = False) -> None:
-        """
-        Create the circuit for obtaining the wanted Bell state with errors before cnot and possible also for ancillas.
-        No assumptions are made, so error correction used is Shor one
-        (see https://en.wikipedia.org/wiki/Quantum_error_correction#The_Shor_code).
-        """
+    def _shor_correction_pre_error(self, keep_barriers: bool) -> None:
         if self.anc_qubit[0].size < 8 or self.anc_qubit[1].size < 8:
             raise Exception(f'This method requires eight ancillas per each qubit. '
                             f'Currently qubit1 has {self.anc_qubit[0].size} ancillas '
                             f'and qubit2 has {self.anc_qubit[1].size} ancillas.')
 
         self.circuit.h(self.qubits[0])
-        self.circuit.barrier()
+        self._add_barrier(keep_barriers)
 
         # Prepare repetition state
-        self._prepare_repetition(self.qubits[0], self.anc_qubit[0])
-        self._prepare_repetition(self.qubits[1], self.anc_qubit[1])
-
-        if symb_err:
-            self.circuit.append(Instruction('err_1', 9, 0, []), [self.qubits[0]] + self.anc_qubit[0][:])
-            self.circuit.append(Instruction('err_2', 9, 0, []), [self.qubits[1]] + self.anc_qubit[1][:])
-            self.circuit.barrier()
-        else:
-            for qubit, error in errors:
-                self.add_error(qubit, error)
-            self.circuit.barrier()
+        self._prepare_repetition(self.qubits[0], self.anc_qubit[0], keep_barriers)
+        self._prepare_repetition(self.qubits[1], self.anc_qubit[1], keep_barriers)
 
+    def _shor_correction_post_error(self, keep_barriers: bool) -> None:
         # Add correction
-        self._add_shor_correction(self.qubits[0], self.anc_qubit[0])
-        self._add_shor_correction(self.qubits[1], self.anc_qubit[1])
+        self._add_shor_correction(self.qubits[0], self.anc_qubit[0], keep_barriers)
+        self._add_shor_correction(self.qubits[1], self.anc_qubit[1], keep_barriers)
 
         self.circuit.cx(self.qubits[0], self.qubits[1])
-        self.circuit.barrier()
+        self._add_barrier(keep_barriers)
 
         self.add_measurement()
+
+    def create_circuit_with_no_correction(self, errors: List[Tuple[Tuple[int, int], str]],
+                                          symb_err: bool = False, keep_barriers: bool = False) -> None:
+        """
+        Create the circuit for obtaining the wanted Bell state with errors before cnot, but no correction.
+        """
+        self._no_correction_pre_error(keep_barriers)
+        self._add_errors(errors, symb_err, on_ancillas=False, keep_barriers=keep_barriers)
+        self._no_correction_post_error(keep_barriers)
+
+    def create_circuit_with_simple_correction(self, errors: List[Tuple[Tuple[int, int], str]],
+                                              symb_err: bool = False, keep_barriers: bool = False) -> None:
+        """
+        Create the circuit for obtaining the wanted Bell state with errors before cnot and only in the qubits,
+        not in the ancillas.
+        """
+        self._simple_correction_pre_error(keep_barriers)
+        self._add_errors(errors, symb_err, on_ancillas=False, keep_barriers=keep_barriers)
+        self._simple_correction_post_error(keep_barriers)
+
+    def create_circuit_with_simple_repetition(self, errors: List[Tuple[Tuple[int, int], str]],
+                                              symb_err: bool = False, keep_barriers: bool = False) -> None:
+        """
+        Create the circuit for obtaining the wanted Bell state with errors before cnot and possible also for ancillas.
+        Use assumption on the initial states to simply correction.
+        """
+        self._simple_repetition_pre_error(keep_barriers)
+        self._add_errors(errors, symb_err, on_ancillas=True, keep_barriers=keep_barriers)
+        self._simple_repetition_post_error(keep_barriers)
+
+    def create_circuit_with_shor_correction(self, errors: List[Tuple[Tuple[int, int], str]],
+                                            symb_err: bool = False, keep_barriers: bool = False) -> None:
+        """
+        Create the circuit for obtaining the wanted Bell state with errors before cnot and possible also for ancillas.
+        No assumptions are made, so error correction used is Shor one
+        (see https://en.wikipedia.org/wiki/Quantum_error_correction#The_Shor_code).
+        """
+        self._shor_correction_pre_error(keep_barriers)
+        self._add_errors(errors, symb_err, on_ancillas=True, keep_barriers=keep_barriers)
+        self._shor_correction_post_error(keep_barriers)
+
+    def create_split_circuit(self, correction_type: str, keep_barriers: bool = False) -> None:
+        """
+        Create the parts of the circuit before and after the errors as two separate circuits, stored in
+        pre_error_circuit and post_error_circuit. Since only the errors change between simulations, the two parts
+        can be built once and reused.
+
+        :param correction_type: type of error correction circuit.
+                                Can be ['no_correction', 'simple', 'repetition_simple', 'shor']
+        :param keep_barriers: whether to add the barriers between the circuit stages.
+        """
+        pre_error, post_error = self._SPLIT_STAGES.get(correction_type, self._SPLIT_STAGES['no_correction'])
+
+        self.circuit = QuantumCircuit(self.qubits, *self.anc_qubit, self.cbits)
+        pre_error(self, keep_barriers)
+        self.pre_error_circuit = self.circuit
+
+        self.circuit = QuantumCircuit(self.qubits, *self.anc_qubit, self.cbits)
+        post_error(self, keep_barriers)
+        self.post_error_circuit = self.circuit
+
+        self.circuit = self.pre_error_circuit.compose(self.post_error_circuit)
+
+    # Stages before and after the errors for each correction type
+    _SPLIT_STAGES = {'no_correction': (_no_correction_pre_error, _no_correction_post_error),
+                     'simple': (_simple_correction_pre_error, _simple_correction_post_error),
+                     'repetition_simple': (_simple_repetition_pre_error, _simple_repetition_post_error),
+                     'shor': (_shor_correction_pre_error, _shor_correction_post_error)}
@@ -1,11 +1,41 @@
+import numpy as np
+import os
 import random
 
-from collections import defaultdict
-from qiskit import Aer, execute, QuantumCircuit
-from typing import Any, Dict, List, Tuple, Union
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import product
+from qiskit import Aer, assemble, QuantumCircuit
+from qiskit.result import Result
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from src.bell_circuit import BellCircuit
 
+# Measurements are only at the end of the circuit, so with the statevector method the simulator runs the circuit once
+# and samples all the shots from the final state. The circuits are small, so a single thread avoids OpenMP overhead.
+# Fusion and precision are left to the simulator defaults: fusion only starts at 14 qubits, wider than any circuit run
+# with the statevector method, and single precision makes the simulator sample, very rarely, states with zero
+# probability.
+_BACKEND = Aer.get_backend('qasm_simulator')
+_BACKEND_OPTIONS = {'method': 'statevector', 'max_parallel_threads': 1}
+# When many circuits are run together, the simulator runs them in parallel instead.
+_BATCH_OPTIONS = {**_BACKEND_OPTIONS, 'max_parallel_threads': 0, 'max_parallel_experiments': os.cpu_count()}
+# The Shor circuit is wide but shallow and made of local gates, so a tensor network (matrix product state) simulation
+# is much faster than the full statevector one.
+_SIMULATION_METHODS = {'shor': 'matrix_product_state'}
+
+# Without correction or with the simple one the measurement depends only on the error gates on the two qubits, so the
+# counts of each (err_1, err_2) pair are simulated once and then looked up. The tables are indexed by number of
+# ancillas and filled as the pairs are simulated.
+_NO_CORR_TABLE = defaultdict(dict)
+_SIMPLE_TABLE = defaultdict(dict)
+_TABLES = {'no_correction': _NO_CORR_TABLE, 'simple': _SIMPLE_TABLE}
+
+_CIRC_BUILDER = {'no_correction': BellCircuit.create_circuit_with_no_correction,
+                 'simple': BellCircuit.create_circuit_with_simple_correction,
+                 'repetition_simple': BellCircuit.create_circuit_with_simple_repetition,
+                 'shor': BellCircuit.create_circuit_with_shor_correction}
+
 
 def get_circuit_to_print(n_ancillas: int, correction_type: str) -> QuantumCircuit:
     """
@@ -17,18 +47,133 @@ def get_circuit_to_print(n_ancillas: int, correction_type: str) -> QuantumCircui
     :return: Qiskit circuit with symbolic error gates.
     """
     qc = BellCircuit(n_ancillas, n_ancillas)
-    if correction_type == 'simple':
-        qc.create_circuit_with_simple_correction([], symb_err=True)
-    elif correction_type == 'repetition_simple':
-        qc.create_circuit_with_simple_repetition([], symb_err=True)
-    elif correction_type == 'shor':
-        qc.create_circuit_with_shor_correction([], symb_err=True)
-    else:
-        qc.create_circuit_with_no_correction([], symb_err=True)
+    create_circuit = _CIRC_BUILDER.get(correction_type, BellCircuit.create_circuit_with_no_correction)
+    create_circuit(qc, [], symb_err=True, keep_barriers=True)
 
     return qc.circuit
 
 
+@lru_cache(maxsize=None)
+def _get_split_circuit(n_ancillas: int, correction_type: str) -> Tuple[QuantumCircuit, QuantumCircuit]:
+    """
+    Build, only once per setup, the parts of the circuit before and after the errors. The circuits only use gates
+    native to the simulator (h, x, z, cx, ccx and measure), so they are not transpiled.
+
+    :param n_ancillas: number of ancillas to correct the error.
+    :param correction_type: type of error correction circuit.
+                            Can be ['no_correction', 'simple', 'repetition_simple', 'shor']
+    :return: Circuits before and after the errors.
+    """
+    qc = BellCircuit(n_ancillas, n_ancillas)
+    qc.create_split_circuit(correction_type)
+
+    return qc.pre_error_circuit, qc.post_error_circuit
+
+
+def _build_circuit(n_ancillas: int,
+                   correction_type: str,
+                   errors: List[Tuple[Tuple[int, int], str]]) -> QuantumCircuit:
+    """
+    Compose the error gates between the cached parts of the circuit.
+
+    :param n_ancillas: number of ancillas to correct the error.
+    :param correction_type: type of error correction circuit.
+                            Can be ['no_correction', 'simple', 'repetition_simple', 'shor']
+    :param errors: Error set up to add to the circuit.
+    :return: Qiskit circuit ready to be run.
+    """
+    pre_error, post_error = _get_split_circuit(n_ancillas, correction_type)
+    qc = BellCircuit(n_ancillas, n_ancillas)
+    for qubit, error in errors:
+        qc.add_error(qubit, error)
+
+    return pre_error.compose(qc.circuit).compose(post_error)
+
+
+def _normalize_errors(correction_type: str,
+                      errors: List[Tuple[Tuple[int, int], str]]) -> Tuple[List[Tuple[Tuple[int, int], str]], str]:
+    """
+    Get the error set up that is actually simulated.
+
+    :param correction_type: type of error correction circuit.
+                            Can be ['no_correction', 'simple', 'repetition_simple', 'shor']
+    :param errors: Error set up to add to the circuit.
+    :return: Error set up to simulate and error in a string format.
+    """
+    if correction_type == 'simple':
+        # In this type of circuit we assume that the error cannot be in the ancillas, so we avoid those cases.
+        errors = [((1, 0), errors[0][1]), ((2, 0), errors[1][1])]
+
+    return errors, f'[({errors[0][0][1]}, {errors[0][1]}), ({errors[1][0][1]}, {errors[1][1]})]'
+
+
+def _run(circuits: Union[QuantumCircuit, List[QuantumCircuit]],
+         correction_type: str,
+         backend_options: Dict[str, Any]) -> Result:
+    """
+    Run the circuits on the simulator, with the simulation method best suited for the correction type.
+
+    :param circuits: Qiskit circuits ready to be run.
+    :param correction_type: type of error correction circuit.
+                            Can be ['no_correction', 'simple', 'repetition_simple', 'shor']
+    :param backend_options: simulator options.
+    :return: Result of the simulation.
+    """
+    backend_options = {**backend_options, 'method': _SIMULATION_METHODS.get(correction_type, backend_options['method'])}
+
+    return _BACKEND.run(assemble(circuits, _BACKEND, shots=1000, **backend_options)).result()
+
+
+def _get_table_key(correction_type: str, errors: List[Tuple[Tuple[int, int], str]]) -> Optional[Tuple[str, str]]:
+    """
+    Get the key of the error set up in the table of its correction type.
+
+    :param correction_type: type of error correction circuit.
+                            Can be ['no_correction', 'simple', 'repetition_simple', 'shor']
+    :param errors: Error set up to simulate.
+    :return: Error gates of the two qubits, or None if the set up is not stored in a table.
+    """
+    (qubit_1, err_1), (qubit_2, err_2) = errors
+    # Errors on the ancillas are not in the table, so they are left to the circuit to be validated.
+    if correction_type not in _TABLES or qubit_1[1] != 0 or qubit_2[1] != 0:
+        return None
+
+    return err_1, err_2
+
+
+def _run_error_setups(n_ancillas: int,
+                      correction_type: str,
+                      error_setups: List[List[Tuple[Tuple[int, int], str]]],
+                      backend_options: Dict[str, Any]) -> List[Tuple[Dict[str, int], str]]:
+    """
+    Run the error set ups in a single job. Set ups already in the table of their correction type are looked up
+    instead, and the new ones are stored in it.
+
+    :param n_ancillas: number of ancillas to correct the error.
+    :param correction_type: type of error correction circuit.
+                            Can be ['no_correction', 'simple', 'repetition_simple', 'shor']
+    :param error_setups: Error set ups to add to the circuit.
+    :param backend_options: simulator options.
+    :return: Measurements count and error in a string format for each error set up.
+    """
+    table = _TABLES[correction_type][n_ancillas] if correction_type in _TABLES else {}
+    normalized_setups = [_normalize_errors(correction_type, error_setup) for error_setup in error_setups]
+    keys = [_get_table_key(correction_type, errors) for errors, _ in normalized_setups]
+
+    to_run = [i for i, key in enumerate(keys) if key not in table]
+    run_counts = {}
+    if to_run:
+        circuits = [_build_circuit(n_ancillas, correction_type, normalized_setups[i][0]) for i in to_run]
+        result = _run(circuits, correction_type, backend_options)
+        for j, i in enumerate(to_run):
+            run_counts[i] = result.get_counts(j)
+            if keys[i] is not None:
+                table[keys[i]] = dict(run_counts[i])
+
+    return [(run_counts[i] if i in run_counts else dict(table[key]), error)
+            for i, (key, (_, error)) in enumerate(zip(keys, normalized_setups))]
+
+
 def run_one_combination(n_ancillas: int,
                         correction_type: str,
                         errors: List[Tuple[Tuple[int, int], str]]) -> Tuple[Dict[str, int], str]:
@@ -41,22 +186,7 @@ def run_one_combination(n_ancillas: int,
     :param errors: Error set up to add to the circuit.
     :return: Measurements count and error in a string format.
     """
-
-    backend = Aer.get_backend('qasm_simulator')
-    qc = BellCircuit(n_ancillas, n_ancillas)
-    error = f'[({errors[0][0][1]}, {errors[0][1]}), ({errors[1][0][1]}, {errors[1][1]})]'
-    if correction_type == 'simple':
-        # In this type of circuit we assume that the error cannot be in the ancillas, so we avoid those cases.
-        error = f'[({0}, {errors[0][1]}), ({0}, {errors[1][1]})]'
-        qc.create_circuit_with_simple_correction([((1, 0), errors[0][1]), ((2, 0), errors[1][1])])
-    elif correction_type == 'repetition_simple':
-        qc.create_circuit_with_simple_repetition(errors)
-    elif correction_type == 'shor':
-        qc.create_circuit_with_shor_correction(errors)
-    else:
-        qc.create_circuit_with_no_correction(errors)
-
-    counts = execute(qc.circuit, backend, shots=1000).result().get_counts()
+    [(counts, error)] = _run_error_setups(n_ancillas, correction_type, [errors], _BACKEND_OPTIONS)
 
     return counts, error
 
@@ -78,33 +208,49 @@ def run_random_errors(n_ancillas: int,
     :return: Total measurements count and error to count dictionary.
     """
     errors = ['i', 'x', 'z']
-    all_counts = defaultdict(int)
-    err_to_counts = {}
+    # The seed can be any hashable, e.g. a string from the command line, so it is passed to numpy through random.
     random.seed(seed)
+    rng = np.random.default_rng(random.getrandbits(64))
 
-    for it in range(iterations):
-        # Generate random error setup
-        qubit_group_1 = random.randint(0, n_ancillas)
-        qubit_group_2 = random.randint(0, n_ancillas)
-        err_1 = random.choices(errors, weights=probabilities)
-        err_2 = random.choices(errors, weights=probabilities)
+    # Generate all the random error setups at once
+    weights = np.asarray(probabilities, dtype=float) / np.sum(probabilities) if probabilities else None
+    qubit_groups_1 = rng.integers(0, n_ancillas + 1, iterations)
+    qubit_groups_2 = rng.integers(0, n_ancillas + 1, iterations)
+    errs_1 = rng.choice(len(errors), size=iterations, p=weights)
+    errs_2 = rng.choice(len(errors), size=iterations, p=weights)
 
-        counts, error = run_one_combination(n_ancillas, correction_type, [((1, qubit_group_1), err_1[0]),
-                                                                          ((2, qubit_group_2), err_2[0])])
+    # Counts are accumulated in a table with a row per error set up, computed from the random indices, and a column per
+    # measured state, read as the integer value of its two bits. All the counts are added at once after the runs.
+    table_shape = (n_ancillas + 1, n_ancillas + 1, len(errors), len(errors))
+    rows = np.ravel_multi_index((qubit_groups_1, qubit_groups_2, errs_1, errs_2), table_shape)
+    row_errors = [None] * int(np.prod(table_shape))
+    row_idx, column_idx, values = [], [], []
 
+    for row, qubit_group_1, qubit_group_2, err_1, err_2 in zip(rows.tolist(), qubit_groups_1.tolist(),
+                                                               qubit_groups_2.tolist(), errs_1.tolist(),
+                                                               errs_2.tolist()):
+        counts, error = run_one_combination(n_ancillas, correction_type, [((1, qubit_group_1), errors[err_1]),
+                                                                          ((2, qubit_group_2), errors[err_2])])
+
+        row_errors[row] = error
         for key, value in counts.items():
-            all_counts[key] += value
+            row_idx.append(row)
+            column_idx.append(int(key, 2))
+            values.append(value)
 
-        if error in err_to_counts:
-            for key, value in counts.items():
-                if key in err_to_counts[error]:
-                    err_to_counts[error][key] += value
-                else:
-                    err_to_counts[error][key] = value
-        else:
-            err_to_counts[error] = counts
+    counts_table = np.zeros((len(row_errors), 2 ** 2), dtype=np.int64)
+    np.add.at(counts_table, (row_idx, column_idx), values)
 
-    return all_counts, err_to_counts
+    all_counts = Counter({format(state, '02b'): int(count)
+                          for state, count in enumerate(counts_table.sum(axis=0)) if count})
+    # Error set ups in order of appearance. Different set ups can have the same error, e.g. with simple correction.
+    err_to_counts = defaultdict(Counter)
+    _, first_idx = np.unique(rows, return_index=True)
+    for row in rows[np.sort(first_idx)].tolist():
+        err_to_counts[row_errors[row]].update({format(state, '02b'): int(count)
+                                               for state, count in enumerate(counts_table[row]) if count})
+
+    return all_counts, dict(err_to_counts)
 
 
 def run_all_combinations(n_ancillas: int, correction_type: str) -> Tuple[Dict[str, int], Dict[str, Dict[str, int]]]:
@@ -117,21 +263,19 @@ def run_all_combinations(n_ancillas: int, correction_type: str) -> Tuple[Dict[st
     :return: Total measurements count and error to count dictionary.
     """
     errors = ['i', 'x', 'z']
-    all_counts = defaultdict(int)
+    all_counts = Counter()
     err_to_counts = {}
 
-    for qubit_group_1 in range(n_ancillas + 1):
-        for qubit_group_2 in range(n_ancillas + 1):
-            for err_1 in errors:
-                for err_2 in errors:
-                    counts, error = run_one_combination(n_ancillas, correction_type, [((1, qubit_group_1), err_1),
-                                                                                      ((2, qubit_group_2), err_2)])
-                    if error in err_to_counts:
-                        # To avoid repetitions in case of simple error correction.
-                        continue
-
-                    for key, value in counts.items():
-                        all_counts[key] += value
-                    err_to_counts[error] = counts
+    # In case of simple error correction the errors in the ancillas are moved to the qubits, so only the qubits are
+    # enumerated to avoid repetitions.
+    qubit_groups = [0] if correction_type == 'simple' else range(n_ancillas + 1)
+    error_setups = [[((1, qubit_group_1), err_1), ((2, qubit_group_2), err_2)]
+                    for qubit_group_1, qubit_group_2, err_1, err_2
+                    in product(qubit_groups, qubit_groups, errors, errors)]
+
+    # Run all the circuits in a single job, so that the simulator can run them in parallel.
+    for counts, error in _run_error_setups(n_ancillas, correction_type, error_setups, _BATCH_OPTIONS):
+        all_counts.update(counts)
+        err_to_counts[error] = Counter(counts)
 
     return all_counts, err_to_counts